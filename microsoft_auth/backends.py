@@ -33,6 +33,8 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger("django")
 
+_EMAIL_RE = re.compile(r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$")
+
 
 class MicrosoftAuthenticationBackend(ModelBackend):
     microsoft: MicrosoftClient
@@ -61,9 +63,9 @@ class MicrosoftAuthenticationBackend(ModelBackend):
             # validate permission scopes
             scope = self.microsoft.valid_scopes(token["scope"])
             refresh_token = ""
-            microsoft_expires_at = "0"
+            microsoft_expires_at = 0
             if "expires_at" in token and scope:
-                microsoft_expires_at = token["expires_at"]
+                microsoft_expires_at = int(token["expires_at"])
             if "refresh_token" in token and scope:
                 refresh_token = token["refresh_token"]
             if "access_token" in token and scope:
@@ -74,8 +76,8 @@ class MicrosoftAuthenticationBackend(ModelBackend):
                 )
         return user
 
-    def _authenticate_user(self, ms_token: str = "", 
-        refresh_token: str = "", microsoft_expires_at: str = ""
+    def _authenticate_user(self, ms_token: str = "",
+        refresh_token: str = "", microsoft_expires_at: int = 0
     ) -> Optional[User]:
         claims = self.microsoft.get_claims()
 
@@ -87,53 +89,63 @@ class MicrosoftAuthenticationBackend(ModelBackend):
 
         return None
 
-    def _get_user_from_microsoft(self, data: Dict[str, str], ms_token: str = "", 
-        refresh_token: str = "", microsoft_expires_at: str = ""
+    def _get_user_from_microsoft(self, data: Dict[str, str], ms_token: str = "",
+        refresh_token: str = "", microsoft_expires_at: int = 0
     ) -> Optional[User]:  # Ignore PyLintBear (E0601)
         User = get_user_model()  # Ignore PyLintBear (W0621)
 
-        user = User.objects.filter(microsoft_id=data["sub"]).first()
-
-        if user is None:
-            namepart = data.get("name", '').split(" ", 1)
-            if len(namepart) > 1:
-                first_name, last_name = namepart
-            else:
-                first_name, last_name = namepart[0], ""
-
-            try:
-                email = ""
-                if re.match(r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)", data["preferred_username"]):
-                    email = data["preferred_username"]
-
-                user = User.objects.get_or_create(
-                    username=data["preferred_username"],
-                    defaults={
-                        'first_name': first_name,
-                        'last_name': last_name,
-                        'username': data["preferred_username"][:150],
-                        'microsoft_id': data["sub"],
-                        'microsoft_code': ms_token,
-                        'microsoft_refresh': refresh_token,
-                        'microsoft_expires_at':microsoft_expires_at,
-                        'email': email
-                    }
-                )[0]
-            except IntegrityError as error:
+        update_fields = [
+            "microsoft_code", "microsoft_refresh", "microsoft_expires_at"
+        ]
+
+        namepart = data.get("name", '').split(" ", 1)
+        if len(namepart) > 1:
+            first_name, last_name = namepart
+        else:
+            first_name, last_name = namepart[0], ""
+
+        email = ""
+        if _EMAIL_RE.match(data["preferred_username"]):
+            email = data["preferred_username"]
+
+        try:
+            user, created = User.objects.get_or_create(
+                microsoft_id=data["sub"],
+                defaults={
+                    'first_name': first_name,
+                    'last_name': last_name,
+                    'username': data["preferred_username"][:150],
+                    'microsoft_code': ms_token,
+                    'microsoft_refresh': refresh_token,
+                    'microsoft_expires_at':microsoft_expires_at,
+                    'email': email
+                }
+            )
+        except IntegrityError as error:
+            # the username already exists for an account that has not
+            # been linked to this Microsoft id yet; link it instead
+            user = User.objects.filter(
+                username=data["preferred_username"][:150]
+            ).first()
+            if user is None:
                 logger.error(f"Enable to create user {error}.")
                 return None
 
-            if not user.microsoft_id:
-                user.microsoft_id = data["sub"]
-                user.save()
+            created = False
+            user.microsoft_id = data["sub"]
+            update_fields.append("microsoft_id")
 
             if user.first_name == "" and user.last_name == "":
                 user.first_name = first_name
                 user.last_name = last_name
-                user.save()
+                update_fields += ["first_name", "last_name"]
+
+        if created:
+            # the insert already persisted every field via defaults
+            return user
 
         user.microsoft_code = ms_token
         user.microsoft_refresh = refresh_token
         user.microsoft_expires_at = microsoft_expires_at
-        user.save()
+        user.save(update_fields=update_fields)
         return user
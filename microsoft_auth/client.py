@@ -17,21 +17,54 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
 
 from django.conf import settings
-from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.db import DatabaseError
 from django.http import HttpRequest
 from django.urls import reverse
 from django.utils.functional import cached_property
 import jwt
 from jwt.algorithms import RSAAlgorithm
+from requests.adapters import HTTPAdapter
 from requests_oauthlib import OAuth2Session
 
-from .utils import get_scheme
+from .utils import get_domain, get_scheme
 
 logger = logging.getLogger("django")
 
+# RSA public keys reconstructed from JWKs, keyed by jwks_uri and kid so a
+# key rotation naturally produces a fresh entry
+_JWK_KEY_CACHE: Dict[str, Any] = {}
+
+# connection pool shared by all MicrosoftClient instances so short-lived
+# sessions keep reusing established TLS connections
+_HTTP_ADAPTER = HTTPAdapter(pool_connections=16, pool_maxsize=64)
+
+
+# namespace for this app's entries in the shared cache; the version segment
+# is bumped whenever the cached payload format changes (e.g. the JWKS moved
+# from a list to a dict) so stale entries from an old release never collide
+_CACHE_KEY_PREFIX = "msauth:1"
+
+
+@lru_cache(maxsize=1)
+def _callback_path() -> str:
+    # the callback route is static per deployment; skip the URL resolver
+    # walk after the first construction
+    return reverse("microsoft_auth:auth-callback")
+
+
+def _openid_cache_key(tenant: str) -> str:
+    return f'{_CACHE_KEY_PREFIX}:openid:{tenant}'
+
+
+def _jwks_cache_key(jwks_uri: str) -> str:
+    return f'{_CACHE_KEY_PREFIX}:jwks:{jwks_uri}'
+
 
 class MicrosoftClient(OAuth2Session):
     """ Simple Microsoft OAuth2 Client to authenticate them
@@ -47,24 +80,26 @@ class MicrosoftClient(OAuth2Session):
 
     _config_url = "https://login.microsoftonline.com/{tenant}/v2.0/.well-known/openid-configuration"  # noqa
 
+    # how long to cache the OpenID configuration and JWKS for; matches the
+    # lifetime Microsoft advertises for the discovery document
+    _config_cache_timeout = 3600
+
     # required OAuth scopes
     SCOPE_MICROSOFT = ["openid", "email", "profile"]
+    _REQUIRED_SCOPES = frozenset(SCOPE_MICROSOFT)
+    _SCOPE_BASE = " ".join(SCOPE_MICROSOFT)
 
     def __init__(
         self, state: str = None, request: HttpRequest = None, base_url: str = None, *args: Any, **kwargs: Any
     ) -> None:
         extra_scopes = getattr(settings, 'MICROSOFT_AUTH_EXTRA_SCOPES', "")
 
-        try:
-            current_site = Site.objects.get_current(request)
-        except Site.DoesNotExist:
-            current_site = Site.objects.first()
-
-        domain = current_site.domain
-        path = base_url or reverse("microsoft_auth:auth-callback")
-        scope = " ".join(self.SCOPE_MICROSOFT)
-
-        scope = f'{scope} {extra_scopes}'.strip()
+        domain = get_domain(request)
+        path = base_url or _callback_path()
+        if extra_scopes:
+            scope = f'{self._SCOPE_BASE} {extra_scopes}'
+        else:
+            scope = self._SCOPE_BASE
 
         scheme = get_scheme(request)
 
@@ -77,8 +112,22 @@ class MicrosoftClient(OAuth2Session):
             **kwargs
         )
 
+        self.mount("https://", _HTTP_ADAPTER)
+
     @cached_property
     def openid_config(self) -> dict:
+        tenant = getattr(settings, 'MICROSOFT_AUTH_TENANT_ID', "")
+        cache_key = _openid_cache_key(tenant)
+        config = cache.get(cache_key)
+        if config is None:
+            config = self._fetch_openid_config()
+            # only cache successful fetches; caching the empty fallback
+            # would pin a transient upstream error for the full timeout
+            if config:
+                cache.set(cache_key, config, self._config_cache_timeout)
+        return config
+
+    def _fetch_openid_config(self) -> dict:
         config_url = self._config_url.format(
             tenant=getattr(settings, 'MICROSOFT_AUTH_TENANT_ID', "")
         )
@@ -89,12 +138,23 @@ class MicrosoftClient(OAuth2Session):
         return {}
 
     @cached_property
-    def jwks(self) -> List[str]:
-        response = self.get(self.openid_config["jwks_uri"])  # Ignore PyLintBear (E1136)
+    def jwks(self) -> Dict[str, dict]:
+        jwks_uri = self.openid_config["jwks_uri"]  # Ignore PyLintBear (E1136)
+        cache_key = _jwks_cache_key(jwks_uri)
+        jwks = cache.get(cache_key)
+        if jwks is None:
+            jwks = self._fetch_jwks(jwks_uri)
+            # as with openid_config, never cache a failed fetch
+            if jwks:
+                cache.set(cache_key, jwks, self._config_cache_timeout)
+        return jwks
+
+    def _fetch_jwks(self, jwks_uri: str) -> Dict[str, dict]:
+        response = self.get(jwks_uri)
         if response.ok:
-            return response.json()["keys"]
+            return {key["kid"]: key for key in response.json()["keys"]}
 
-        return []
+        return {}
 
     def get_claims(self) -> Optional[Dict[Any, Any]]:
         if self.token is None:
@@ -104,22 +164,32 @@ class MicrosoftClient(OAuth2Session):
 
         kid = jwt.get_unverified_header(token)["kid"]
 
-        for key in self.jwks:
-            if kid == key["kid"]:
-                jwk = key
-                break
+        jwk = self.jwks.get(kid)
+
+        if jwk is None:
+            # the cached JWKS may predate a Microsoft key rotation;
+            # invalidate and refetch exactly once before giving up
+            jwks_uri = self.openid_config["jwks_uri"]  # Ignore PyLintBear (E1136)
+            cache.delete(_jwks_cache_key(jwks_uri))
+            self.__dict__.pop("jwks", None)
+            jwk = self.jwks.get(kid)
 
         if jwk is None:
             logger.warning("could not find public key for id_token")
             return None
 
-        public_key = RSAAlgorithm.from_jwk(json.dumps(jwk))
+        cache_key = f'{self.openid_config["jwks_uri"]}:{kid}'  # Ignore PyLintBear (E1136)
+        public_key = _JWK_KEY_CACHE.get(cache_key)
+        if public_key is None:
+            public_key = _JWK_KEY_CACHE.setdefault(
+                cache_key, RSAAlgorithm.from_jwk(json.dumps(jwk))
+            )
 
         try:
             claims = jwt.decode(
                 token,
                 public_key,
-                algoithm="RS256",
+                algorithms=["RS256"],
                 audience=getattr(settings, 'MICROSOFT_AUTH_CLIENT_ID', ""),
             )
         except jwt.PyJWTError as e:
@@ -128,12 +198,27 @@ class MicrosoftClient(OAuth2Session):
 
         return claims
 
-    def authorization_url(self) -> str:
-        """ Generates Microsoft or a Office 365 Authorization URL """
+    def authorization_url(self) -> Tuple[str, str]:
+        """ Generates Microsoft or a Office 365 Authorization URL
 
-        auth_url = self.openid_config["authorization_endpoint"]  # Ignore PyLintBear (E1136)
+        The endpoint comes from the cached discovery document and the
+        query string is urlencoded directly, skipping oauthlib's
+        prepare_request_uri machinery per request
+        """
 
-        return super().authorization_url(auth_url, response_mode="form_post")
+        auth_url = self.openid_config["authorization_endpoint"]  # Ignore PyLintBear (E1136)
+        state = self.new_state()
+
+        params = urlencode({
+            "response_type": "code",
+            "client_id": self.client_id,
+            "redirect_uri": self.redirect_uri,
+            "scope": self.scope,
+            "state": state,
+            "response_mode": "form_post",
+        })
+        separator = "&" if "?" in auth_url else "?"
+        return f'{auth_url}{separator}{params}', state
 
     def fetch_token(self, **kwargs: Any) -> Dict[str, str]:
         """ Fetch OAuth2 Token with given kwargs"""
@@ -146,8 +231,8 @@ class MicrosoftClient(OAuth2Session):
         )
 
     def valid_scopes(self, scopes: str) -> bool:
-        # verify all require_scopes are in scopes
-        return set(self.SCOPE_MICROSOFT) <= set(scopes)
+        # verify all required scopes are in the space-separated scope string
+        return self._REQUIRED_SCOPES.issubset(scopes.split())
 
     def refresh_token(self, user: 'User') -> bool:
         token_endpoint = self.openid_config["token_endpoint"]  # Ignore PyLintBear (E1136)
@@ -158,12 +243,16 @@ class MicrosoftClient(OAuth2Session):
             client_secret=getattr(settings, 'MICROSOFT_AUTH_CLIENT_SECRET', ""),
         )
         if "refresh_token" in token_payload and "access_token" in token_payload:
+            user.microsoft_code = token_payload["access_token"]
+            user.microsoft_refresh = token_payload["refresh_token"]
+            user.microsoft_expires_at = int(token_payload.get("expires_at", 0))
             try:
-                user.microsoft_code = token_payload["access_token"]
-                user.microsoft_refresh = token_payload["refresh_token"]
-                user.microsoft_expires_at = token_payload["expires_at"]
-                user.save()
-            except:
+                user.save(update_fields=[
+                    "microsoft_code", "microsoft_refresh",
+                    "microsoft_expires_at",
+                ])
+            except DatabaseError as error:
+                logger.error(f"Enable to save refreshed token {error}.")
                 return False
             return True
         return False
\ No newline at end of file
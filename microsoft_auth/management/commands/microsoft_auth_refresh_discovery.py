@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from ...client import MicrosoftClient, _jwks_cache_key, _openid_cache_key
+
+
+class Command(BaseCommand):
+    help = (
+        "Refreshes the cached Microsoft OpenID configuration and JWKS so "
+        "login requests never fetch them synchronously. Schedule it (cron, "
+        "Celery beat, systemd timer) more often than the cache timeout."
+    )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        tenant = getattr(settings, 'MICROSOFT_AUTH_TENANT_ID', "")
+        client = MicrosoftClient()
+
+        openid_config = client._fetch_openid_config()
+        if not openid_config:
+            raise CommandError("could not fetch the OpenID configuration")
+        cache.set(
+            _openid_cache_key(tenant),
+            openid_config,
+            client._config_cache_timeout,
+        )
+
+        jwks_uri = openid_config["jwks_uri"]
+        jwks = client._fetch_jwks(jwks_uri)
+        if not jwks:
+            raise CommandError("could not fetch the JWKS")
+        cache.set(_jwks_cache_key(jwks_uri), jwks, client._config_cache_timeout)
+
+        self.stdout.write(
+            f"refreshed OpenID configuration and {len(jwks)} JWKS keys "
+            f"for tenant '{tenant}'"
+        )
@@ -1,14 +1,45 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.signing import TimestampSigner
 from django.http import HttpRequest
 
 
+@lru_cache(maxsize=None)
+def get_signer() -> TimestampSigner:
+    """ Returns a shared TimestampSigner instead of deriving one per request """
+    return TimestampSigner()
+
+
+def get_domain(request: HttpRequest = None) -> str:
+    """ Returns the current site's domain, computed once per request """
+    if request is not None and hasattr(request, "_msauth_site_domain"):
+        return request._msauth_site_domain
+
+    try:
+        domain = Site.objects.get_current(request).domain
+    except Site.DoesNotExist:
+        domain = Site.objects.first().domain
+
+    if request is not None:
+        request._msauth_site_domain = domain
+    return domain
+
+
 def get_scheme(request: HttpRequest) -> str:
+    if request is not None and hasattr(request, "_msauth_scheme"):
+        return request._msauth_scheme
+
     scheme = "https"
     if settings.DEBUG and request is not None:
         if "HTTP_X_FORWARDED_PROTO" in request.META:
             scheme = request.META["HTTP_X_FORWARDED_PROTO"]
         else:
             scheme = request.scheme
+
+    if request is not None:
+        request._msauth_scheme = scheme
     return scheme